@@ -1,11 +1,20 @@
 # app/main.py
+import os
+
+# ---------------- BLAS THREADS ----------------
+# Concurrency comes from uvicorn workers and the request threadpool; the match
+# matmuls are tiny, so per-call BLAS/OpenMP threads only oversubscribe cores.
+# Must be set before numpy is first imported (via the routers below).
+os.environ.setdefault("OMP_NUM_THREADS", "1")
+os.environ.setdefault("OPENBLAS_NUM_THREADS", "1")
+os.environ.setdefault("MKL_NUM_THREADS", "1")
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.routes import (
     users, skills, opportunities, mentorships,
     opportunity_skills, user_skills, match, resume_ats
 )
-from app.utils.firebase_chat_db import get_firebase_chat_db
 
 app = FastAPI(
     title="SkillSync Backend (Firebase + Supabase)",
@@ -13,18 +22,6 @@ app = FastAPI(
     description="Complete mentorship platform with Resume ATS Scorer"
 )
 
-# ---------------- STARTUP ----------------
-@app.on_event("startup")
-async def startup_event():
-    # Initialize Firebase
-    try:
-        get_firebase_chat_db()
-        print("✅ Firebase initialized")
-    except Exception as e:
-        print(f"⚠️ Firebase initialization failed: {e}")
-        import traceback
-        traceback.print_exc()
-
 # ---------------- CORS (Must be before routers) ----------------
 app.add_middleware(
     CORSMiddleware,
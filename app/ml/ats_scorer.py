@@ -1,10 +1,38 @@
 # app/ml/ats_scorer.py
+import multiprocessing
+import os
 import re
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from threading import Lock
 from typing import Dict, List, Tuple
-import PyPDF2
+import fitz  # PyMuPDF
 import docx
+from flashtext import KeywordProcessor
 from io import BytesIO
 
+# Resumes are 1-2 pages; pages beyond this are not extracted
+MAX_PDF_PAGES = 5
+
+# Scoring processes per uvicorn worker; most parallelism comes from running
+# several uvicorn workers, so keep this small
+ATS_SCORER_PROCESSES = int(os.getenv("ATS_SCORER_PROCESSES", "2"))
+
+
+def count_matches(pattern: re.Pattern, text: str) -> int:
+    """Count regex matches without materializing a findall() list"""
+    return sum(1 for _ in pattern.finditer(text))
+
+
+@dataclass
+class TextStats:
+    """Views of the resume text computed once and shared by all sub-scorers"""
+    text: str
+    text_lower: str
+    word_count: int
+    sentence_count: int
+
+
 class ATSScorer:
     """
     ATS (Applicant Tracking System) Resume Scorer
@@ -21,6 +49,10 @@ class ATSScorer:
             'certifications': ['certifications', 'certificates', 'licenses'],
             'summary': ['summary', 'objective', 'profile', 'about me']
         }
+        self._critical_sections = frozenset({'experience', 'education', 'skills'})
+        
+        # Location hints (city/state), matched as substrings of the lowercased text
+        self._location_indicators = ('city', 'state', ',', 'street', 'address')
         
         # Action verbs for experience descriptions
         self.action_verbs = [
@@ -30,15 +62,49 @@ class ATSScorer:
             'established', 'streamlined', 'pioneered', 'spearheaded', 'executed',
             'transformed', 'accelerated', 'expanded', 'strengthened', 'orchestrated'
         ]
+        
+        # Keyword tries: one linear pass over the text instead of one scan per keyword.
+        # Keywords are lowercase and callers pass TextStats.text_lower, so the
+        # processors skip their own lowercasing of the text.
+        self._section_processor = KeywordProcessor(case_sensitive=True)
+        self._section_processor.add_keywords_from_dict(self.section_headers)
+        
+        self._action_verb_processor = KeywordProcessor(case_sensitive=True)
+        self._action_verb_processor.add_keywords_from_list(self.action_verbs)
+        
+        # Precompiled patterns (compiled once, reused across requests)
+        self._email_re = re.compile(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b')
+        self._phone_res = [
+            re.compile(r'\b\d{3}[-.]?\d{3}[-.]?\d{4}\b'),  # 123-456-7890 or 1234567890
+            re.compile(r'\(\d{3}\)\s*\d{3}[-.]?\d{4}'),     # (123) 456-7890
+            re.compile(r'\+\d{1,3}[-.\s]?\d{3}[-.\s]?\d{3}[-.\s]?\d{4}')  # +1-123-456-7890
+        ]
+        self._url_re = re.compile(r'https?://')
+        self._dash_bullet_re = re.compile(r'\n\s*[-–—]\s+')
+        # Month Year | MM/YYYY | bare year (2020, 2021) in a single pass.
+        # with_year marks dates that also contain a 19xx/20xx year; those
+        # count twice, as they did when the year was matched separately
+        self._date_re = re.compile(
+            r'\b(?:(?P<with_year>(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*\s+(?:19|20)\d{2}'
+            r'|\d{1,2}/(?:19|20)\d{2})'
+            r'|\d{1,2}/\d{4}'
+            r'|(?:19|20)\d{2})\b'
+        )
+        self._number_re = re.compile(r'\d+%|\$\d+|\d+[km]?\+|\d+x')
+        self._all_caps_re = re.compile(r'\b[A-Z]{4,}\b')
+        self._multispace_re = re.compile(r'\s{3,}')
+        self._missing_space_re = re.compile(r'[a-z]\.[A-Z]')
+        self._passive_re = re.compile(r'\b(?:was|were|been|being)\b')
     
     def extract_text_from_pdf(self, file_bytes: bytes) -> str:
         """Extract text from PDF file"""
         try:
-            pdf_file = BytesIO(file_bytes)
-            pdf_reader = PyPDF2.PdfReader(pdf_file)
-            text = ""
-            for page in pdf_reader.pages:
-                text += page.extract_text() + "\n"
+            doc = fitz.open(stream=file_bytes, filetype="pdf")
+            try:
+                page_count = min(MAX_PDF_PAGES, doc.page_count)
+                text = "\n".join(doc[i].get_text("text") for i in range(page_count))
+            finally:
+                doc.close()
             return text
         except Exception as e:
             raise Exception(f"Failed to extract text from PDF: {str(e)}")
@@ -48,7 +114,7 @@ class ATSScorer:
         try:
             docx_file = BytesIO(file_bytes)
             doc = docx.Document(docx_file)
-            text = "\n".join([paragraph.text for paragraph in doc.paragraphs])
+            text = "\n".join(paragraph.text for paragraph in doc.paragraphs)
             return text
         except Exception as e:
             raise Exception(f"Failed to extract text from DOCX: {str(e)}")
@@ -62,15 +128,25 @@ class ATSScorer:
         else:
             raise ValueError("Unsupported file format. Only PDF and DOCX are supported.")
     
-    def calculate_contact_info_score(self, text: str) -> Tuple[int, List, Dict]:
+    def compute_text_stats(self, text: str) -> TextStats:
+        """Tokenize and lowercase the text once for all sub-scorers"""
+        return TextStats(
+            text=text,
+            text_lower=text.lower(),
+            word_count=len(text.split()),
+            sentence_count=sum(1 for s in text.split('.') if s.strip())
+        )
+    
+    def calculate_contact_info_score(self, stats: TextStats) -> Tuple[int, List, Dict]:
         """Check for essential contact information"""
         score = 0
         suggestions = []
         found_info = {}
-        text_lower = text.lower()
+        text = stats.text
+        text_lower = stats.text_lower
         
         # Email
-        email_match = re.search(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b', text)
+        email_match = self._email_re.search(text)
         if email_match:
             score += 25
             found_info['email'] = email_match.group()
@@ -78,15 +154,9 @@ class ATSScorer:
             suggestions.append("❌ Missing professional email address")
         
         # Phone number (various formats)
-        phone_patterns = [
-            r'\b\d{3}[-.]?\d{3}[-.]?\d{4}\b',  # 123-456-7890 or 1234567890
-            r'\(\d{3}\)\s*\d{3}[-.]?\d{4}',     # (123) 456-7890
-            r'\+\d{1,3}[-.\s]?\d{3}[-.\s]?\d{3}[-.\s]?\d{4}'  # +1-123-456-7890
-        ]
-        
         phone_found = False
-        for pattern in phone_patterns:
-            phone_match = re.search(pattern, text)
+        for pattern in self._phone_res:
+            phone_match = pattern.search(text)
             if phone_match:
                 score += 25
                 found_info['phone'] = phone_match.group()
@@ -97,53 +167,47 @@ class ATSScorer:
             suggestions.append("❌ Missing phone number")
         
         # LinkedIn
-        if 'linkedin.com' in text_lower or 'linkedin' in text_lower:
+        if 'linkedin' in text_lower:
             score += 15
             found_info['linkedin'] = True
         else:
             suggestions.append("💡 Consider adding LinkedIn profile")
         
         # GitHub/Portfolio (optional but good)
-        if 'github.com' in text_lower or 'portfolio' in text_lower or re.search(r'https?://', text):
+        if 'github.com' in text_lower or 'portfolio' in text_lower or self._url_re.search(text):
             score += 10
             found_info['portfolio'] = True
         
         # Location (city/state)
-        location_indicators = ['city', 'state', ',', 'street', 'address']
         # Simple check: if there's a pattern like "City, State" or just presence of location keywords
-        if any(indicator in text_lower for indicator in location_indicators):
+        if any(indicator in text_lower for indicator in self._location_indicators):
             score += 10
             found_info['location'] = True
         
         # Name (check for capitalized words at the beginning)
-        lines = text.strip().split('\n')
-        if lines and len(lines[0].strip()) > 2:
+        first_line = text.lstrip().partition('\n')[0].strip()
+        if len(first_line) > 2:
             score += 15
-            found_info['name'] = lines[0].strip()
+            found_info['name'] = first_line
         else:
             suggestions.append("❌ Add your full name prominently at the top")
         
         return min(100, score), suggestions, found_info
     
-    def calculate_structure_score(self, text: str) -> Tuple[int, List, Dict]:
+    def calculate_structure_score(self, stats: TextStats) -> Tuple[int, List, Dict]:
         """Evaluate resume structure and section presence"""
         score = 0
         suggestions = []
         found_sections = {}
-        text_lower = text.lower()
         
         # Check for key sections
-        for section_name, keywords in self.section_headers.items():
-            section_found = False
-            for keyword in keywords:
-                if re.search(rf'\b{keyword}\b', text_lower):
-                    section_found = True
-                    found_sections[section_name] = True
-                    score += 15
-                    break
-            
-            if not section_found:
-                if section_name in ['experience', 'education', 'skills']:
+        present = set(self._section_processor.extract_keywords(stats.text_lower))
+        for section_name in self.section_headers:
+            if section_name in present:
+                found_sections[section_name] = True
+                score += 15
+            else:
+                if section_name in self._critical_sections:
                     suggestions.append(f"❌ Missing critical section: {section_name.title()}")
                 else:
                     suggestions.append(f"💡 Consider adding: {section_name.title()} section")
@@ -154,14 +218,15 @@ class ATSScorer:
         
         return min(100, score), suggestions, found_sections
     
-    def calculate_formatting_score(self, text: str) -> Tuple[int, List]:
+    def calculate_formatting_score(self, stats: TextStats) -> Tuple[int, List]:
         """Check formatting and readability"""
         score = 0
         suggestions = []
+        text = stats.text
         
         # Check for bullet points (good for ATS and readability)
         bullet_count = text.count('•') + text.count('●') + text.count('○')
-        dash_bullets = len(re.findall(r'\n\s*[-–—]\s+', text))
+        dash_bullets = count_matches(self._dash_bullet_re, text)
         total_bullets = bullet_count + dash_bullets
         
         if total_bullets >= 10:
@@ -173,7 +238,7 @@ class ATSScorer:
             suggestions.append("❌ Use bullet points to list achievements and responsibilities")
         
         # Check length (ideal: 400-1200 words for 1-2 pages)
-        word_count = len(text.split())
+        word_count = stats.word_count
         
         if 400 <= word_count <= 1200:
             score += 25
@@ -185,27 +250,21 @@ class ATSScorer:
             suggestions.append("⚠️ Resume is lengthy. Try to keep it concise (1-2 pages)")
         
         # Check for dates (work experience dates)
-        date_patterns = [
-            r'\b(19|20)\d{2}\b',  # Years like 2020, 2021
-            r'\b(Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*\s+(19|20)\d{2}\b',  # Month Year
-            r'\b\d{1,2}/\d{4}\b'  # MM/YYYY
-        ]
-        
-        dates_found = sum(len(re.findall(pattern, text)) for pattern in date_patterns)
+        dates_found = sum(1 + (match['with_year'] is not None) for match in self._date_re.finditer(text))
         if dates_found >= 2:
             score += 20
         else:
             suggestions.append("💡 Include dates for your work experience and education")
         
         # Check for quantifiable achievements (numbers/percentages)
-        numbers = re.findall(r'\d+%|\$\d+|\d+[km]?\+|\d+x', text.lower())
-        if len(numbers) >= 3:
+        number_count = count_matches(self._number_re, stats.text_lower)
+        if number_count >= 3:
             score += 15
         else:
             suggestions.append("💡 Add quantifiable achievements (e.g., 'Increased sales by 30%', 'Managed team of 5')")
         
         # Check for action verbs
-        action_verb_count = sum(1 for verb in self.action_verbs if verb in text.lower())
+        action_verb_count = len(set(self._action_verb_processor.extract_keywords(stats.text_lower)))
         if action_verb_count >= 5:
             score += 10
         else:
@@ -213,19 +272,18 @@ class ATSScorer:
         
         return min(100, score), suggestions
     
-    def calculate_readability_score(self, text: str) -> Tuple[int, List]:
+    def calculate_readability_score(self, stats: TextStats) -> Tuple[int, List]:
         """Assess readability and writing quality"""
         score = 0
         suggestions = []
+        text = stats.text
+        word_count = stats.word_count
         
-        sentences = [s.strip() for s in text.split('.') if s.strip()]
-        words = text.split()
-        
-        if len(sentences) == 0 or len(words) == 0:
+        if stats.sentence_count == 0 or word_count == 0:
             return 0, ["❌ Resume appears empty or poorly formatted"]
         
         # Average sentence length (shorter is better for resumes)
-        avg_sentence_length = len(words) / max(len(sentences), 1)
+        avg_sentence_length = word_count / max(stats.sentence_count, 1)
         
         if 10 <= avg_sentence_length <= 20:
             score += 30
@@ -236,12 +294,11 @@ class ATSScorer:
             score += 20
         
         # Check for passive voice (should be minimal)
-        passive_indicators = ['was', 'were', 'been', 'being']
-        passive_count = sum(text.lower().count(word) for word in passive_indicators)
+        passive_count = count_matches(self._passive_re, stats.text_lower)
         
-        if passive_count < len(words) * 0.03:  # Less than 3%
+        if passive_count < word_count * 0.03:  # Less than 3%
             score += 30
-        elif passive_count < len(words) * 0.07:  # Less than 7%
+        elif passive_count < word_count * 0.07:  # Less than 7%
             score += 20
             suggestions.append("💡 Reduce passive voice. Use active voice (e.g., 'Led team' vs 'Team was led by me')")
         else:
@@ -249,7 +306,7 @@ class ATSScorer:
             suggestions.append("❌ Too much passive voice. Use active voice for stronger impact")
         
         # Check for proper capitalization (not all caps)
-        all_caps_words = len(re.findall(r'\b[A-Z]{4,}\b', text))
+        all_caps_words = count_matches(self._all_caps_re, text)
         if all_caps_words < 3:
             score += 20
         else:
@@ -257,13 +314,13 @@ class ATSScorer:
         
         # Check for spelling/grammar indicators (basic check)
         # Multiple spaces, missing periods, etc.
-        if not re.search(r'\s{3,}', text):  # No excessive spacing
+        if not self._multispace_re.search(text):  # No excessive spacing
             score += 10
         else:
             suggestions.append("💡 Clean up formatting - remove excessive spaces")
         
         # Check for consistent formatting
-        if not re.search(r'[a-z]\.[A-Z]', text):  # Basic check for missing spaces after periods
+        if not self._missing_space_re.search(text):  # Basic check for missing spaces after periods
             score += 10
         
         return min(100, score), suggestions
@@ -288,15 +345,17 @@ class ATSScorer:
         """
         # Extract text
         text = self.extract_text(file_bytes, filename)
+        stats = self.compute_text_stats(text)
         
-        if not text.strip():
+        # No words means the text is empty or whitespace only
+        if stats.word_count == 0:
             raise ValueError("Unable to extract text from resume. File may be corrupted or empty.")
         
         # Calculate scores
-        contact_score, contact_suggestions, contact_info = self.calculate_contact_info_score(text)
-        structure_score, structure_suggestions, found_sections = self.calculate_structure_score(text)
-        formatting_score, formatting_suggestions = self.calculate_formatting_score(text)
-        readability_score, readability_suggestions = self.calculate_readability_score(text)
+        contact_score, contact_suggestions, contact_info = self.calculate_contact_info_score(stats)
+        structure_score, structure_suggestions, found_sections = self.calculate_structure_score(stats)
+        formatting_score, formatting_suggestions = self.calculate_formatting_score(stats)
+        readability_score, readability_suggestions = self.calculate_readability_score(stats)
         
         # Calculate overall score (weighted average)
         overall_score = int(
@@ -317,9 +376,6 @@ class ATSScorer:
         all_suggestions.extend(formatting_suggestions)
         all_suggestions.extend(readability_suggestions)
         
-        # Word count
-        word_count = len(text.split())
-        
         return {
             'overall_score': overall_score,
             'contact_score': contact_score,
@@ -330,6 +386,45 @@ class ATSScorer:
             'found_sections': found_sections,
             'suggestions': all_suggestions,
             'overall_feedback': self.generate_overall_feedback(overall_score),
-            'word_count': word_count,
+            'word_count': stats.word_count,
             'resume_text_preview': text[:500] + '...' if len(text) > 500 else text
-        }
\ No newline at end of file
+        }
+
+
+# Shared scorer instance: patterns and keyword tries are built once per process
+ats_scorer = ATSScorer()
+
+
+_process_pool = None
+_process_pool_lock = Lock()
+
+
+def get_process_pool() -> ProcessPoolExecutor:
+    """Start the scoring process pool on first use and reuse it afterwards"""
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is None:
+            # forkserver: workers start from a clean server process rather than
+            # forking this one mid-request with threads (and their locks) live
+            _process_pool = ProcessPoolExecutor(
+                max_workers=ATS_SCORER_PROCESSES,
+                mp_context=multiprocessing.get_context("forkserver")
+            )
+        return _process_pool
+
+
+def reset_process_pool(pool: ProcessPoolExecutor) -> None:
+    """
+    Discard a broken pool (a worker process died) so the next
+    get_process_pool() starts a fresh one; no-op if already replaced
+    """
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is pool:
+            _process_pool = None
+    pool.shutdown(wait=False)
+
+
+def score_in_worker(file_bytes: bytes, filename: str) -> Dict:
+    """Process pool entry point: scores with the worker process's own ats_scorer"""
+    return ats_scorer.score_resume(file_bytes, filename)
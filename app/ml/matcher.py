@@ -3,17 +3,48 @@
 Advanced Matching Algorithm for SkillSync
 Uses semantic embeddings + multi-factor scoring instead of simple cosine similarity
 """
-from sklearn.metrics.pairwise import cosine_similarity
+import numpy as np
 
-def build_skill_vector(user_skills, all_skills):
+def build_skill_index(all_skills):
+    """
+    Map each skill name to its column in the skill vectors.
+    """
+    return {skill: idx for idx, skill in enumerate(all_skills)}
+
+def build_skill_vector(user_skills, skill_index):
     """
     Convert a list of user skills into a binary vector
-    based on the list of all skills.
+    with one column per entry of skill_index.
+    """
+    vec = np.zeros(len(skill_index), dtype=np.float32)
+    vec[[skill_index[skill] for skill in user_skills if skill in skill_index]] = 1.0
+    return vec
+
+def build_skill_matrix(skill_lists, skill_index):
+    """
+    Stack the skill vectors of many users into one (n_users, n_skills)
+    matrix, one row per skill list. Rows are L2-normalized so cosine
+    similarity against them is a plain dot product; empty rows stay zero.
     """
-    return [1 if skill in user_skills else 0 for skill in all_skills]
+    matrix = np.zeros((len(skill_lists), len(skill_index)), dtype=np.float32)
+    rows, cols = [], []
+    for row, skills in enumerate(skill_lists):
+        for skill in skills:
+            if skill in skill_index:
+                rows.append(row)
+                cols.append(skill_index[skill])
+    matrix[rows, cols] = 1.0
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return np.divide(matrix, norms, out=matrix, where=norms > 0)
 
-def compute_match_score(mentee_vec, mentor_vec):
+def compute_match_scores(mentee_vec, mentor_matrix):
     """
-    Compute cosine similarity between two skill vectors.
+    Compute cosine similarity between one skill vector and every
+    row of a matrix from build_skill_matrix in a single call.
+    Rows (or a mentee vector) that are all zeros score 0.0.
     """
-    return cosine_similarity([mentee_vec], [mentor_vec])[0][0]
+    u = np.asarray(mentee_vec, dtype=np.float32)
+    norm = np.linalg.norm(u)
+    if not norm:
+        return np.zeros(len(mentor_matrix), dtype=np.float32)
+    return mentor_matrix @ (u / norm)
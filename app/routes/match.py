@@ -1,73 +1,182 @@
 # app/routes/match.py
+import asyncio
+import time
+from functools import lru_cache, partial
 from fastapi import APIRouter, Depends, HTTPException
-from typing import List, Dict
+from fastapi.responses import ORJSONResponse
+from typing import List, Dict, Tuple
+import numpy as np
 
 from app.db import get_supabase
 from app.schemas.match_schema import MatchRequest
-from app.ml.matcher import build_skill_vector, compute_match_score
+from app.ml.matcher import build_skill_index, build_skill_vector, build_skill_matrix, compute_match_scores
 from app.routes.users import get_user_by_username
-
-router = APIRouter(prefix="/match", tags=["Matching"])
+from app.utils.match_cache import get_cached_matches, cache_matches, skills_version
+
+router = APIRouter(prefix="/match", tags=["Matching"], default_response_class=ORJSONResponse)
+
+SKILLS_CACHE_TTL = 300  # seconds
+IN_FILTER_CHUNK = 100  # user or skill ids per in_() filter; keeps request URLs short (row counts are paged)
+PAGE_SIZE = 1000  # rows per .range() page; must not exceed PostgREST's max-rows (Supabase default 1000)
+
+supabase = get_supabase()
+
+
+@lru_cache(maxsize=1)
+def _load_skills(ttl_bucket: int, version: int) -> Tuple[Dict, Dict]:
+    """
+    Fetch all skills once per TTL window.
+    Returns (skill name -> vector column index, skill_id -> name map).
+    ttl_bucket changes every SKILLS_CACHE_TTL seconds and version on every
+    skills write in this process; either change expires the cached copy.
+    """
+    all_skills = _all_rows(lambda: supabase.table("skills").select("skill_id, name").order("skill_id"))
+    skill_index = build_skill_index([s["name"] for s in all_skills])
+    skill_id_to_name = {s["skill_id"]: s["name"] for s in all_skills}
+    return skill_index, skill_id_to_name
+
+
+def _rows(query) -> List[Dict]:
+    """
+    Execute a PostgREST query builder and return its rows (blocking; run via asyncio.to_thread).
+    """
+    return query.execute().data
+
+
+def _all_rows(make_query) -> List[Dict]:
+    """
+    Fetch every row of the query built by make_query(), PAGE_SIZE rows at a time,
+    until a short page comes back (blocking; run via asyncio.to_thread).
+    PostgREST silently truncates results at max-rows, so a single request can drop rows.
+    make_query must return a fresh builder ordered by a unique key so pages are stable.
+    """
+    rows = []
+    start = 0
+    while True:
+        page = make_query().range(start, start + PAGE_SIZE - 1).execute().data
+        rows.extend(page)
+        if len(page) < PAGE_SIZE:
+            return rows
+        start += PAGE_SIZE
+
+
+async def _rows_in_chunks(query_for_ids, ids: List) -> List[Dict]:
+    """
+    Run query_for_ids(chunk) for every IN_FILTER_CHUNK-sized slice of ids concurrently,
+    paging each one through _all_rows, and return all rows, in chunk order.
+    """
+    chunks = await asyncio.gather(*(
+        asyncio.to_thread(_all_rows, partial(query_for_ids, ids[start:start + IN_FILTER_CHUNK]))
+        for start in range(0, len(ids), IN_FILTER_CHUNK)
+    ))
+    return [row for chunk in chunks for row in chunk]
+
+
+def load_skills() -> Tuple[Dict, Dict]:
+    """
+    All skills as (name -> column index, skill_id -> name map), refreshed at most every SKILLS_CACHE_TTL seconds
+    or after a skills write.
+    """
+    return _load_skills(int(time.time() // SKILLS_CACHE_TTL), skills_version())
 
 
 @router.post("/all")
-def match_all(data: MatchRequest, supabase = Depends(get_supabase)) -> Dict[str, List[Dict]]:
+async def match_all(data: MatchRequest, supabase = Depends(get_supabase)) -> Dict[str, List[Dict]]:
     # Get the current user (mentee or mentor)
-    user = get_user_by_username(data.username)
+    user = await asyncio.to_thread(get_user_by_username, data.username)
     if not user:
         raise HTTPException(status_code=400, detail="Invalid user")
 
     role = user["role"]
     target_role = "mentor" if role == "mentee" else "mentee"
 
-    # Fetch all target users
-    targets = (
-        supabase.table("users")
-        .select("*")
-        .eq("role", target_role)
-        .execute()
-        .data
+    # Concurrently: all skills (vector layout + skill_id -> name lookup, cached
+    # across requests) and the current user's skills
+    (skill_index, skill_id_to_name), user_skill_rows = await asyncio.gather(
+        asyncio.to_thread(load_skills),
+        asyncio.to_thread(
+            _rows,
+            supabase.table("user_skills")
+            .select("skill_id")
+            .eq("user_id", user["user_id"])
+        )
+    )
+    user_skill_ids = [row["skill_id"] for row in user_skill_rows if row["skill_id"] in skill_id_to_name]
+    user_skill_names = [skill_id_to_name[skill_id] for skill_id in user_skill_ids]
+
+    # The ranking depends only on the target role and the user's skill set
+    cache_key = (target_role, tuple(sorted(user_skill_names)))
+    cached = get_cached_matches(cache_key)
+    if cached is not None:
+        return {"matches": cached}
+
+    # Candidates: users sharing at least one skill with the current user.
+    # Anyone else has a cosine score of 0 and would be filtered out anyway.
+    overlap_rows = await _rows_in_chunks(
+        lambda skill_ids: (
+            supabase.table("user_skills")
+            .select("user_id")
+            .in_("skill_id", skill_ids)
+            .order("user_id")
+            .order("skill_id")
+        ),
+        user_skill_ids
+    )
+    candidate_ids = sorted({row["user_id"] for row in overlap_rows} - {user["user_id"]})
+
+    # Fetch the candidates that have the target role
+    targets = await _rows_in_chunks(
+        lambda user_ids: (
+            supabase.table("users")
+            .select("user_id, username, name, role")
+            .eq("role", target_role)
+            .in_("user_id", user_ids)
+            .order("user_id")
+        ),
+        candidate_ids
     )
 
-    # Fetch all skill names
-    all_skills = supabase.table("skills").select("name").execute().data
-    all_skill_names = [s["name"] for s in all_skills]
+    # Fetch full skill lists for every target in bulk
+    target_ids = [target["user_id"] for target in targets]
+    skill_rows = await _rows_in_chunks(
+        lambda user_ids: (
+            supabase.table("user_skills")
+            .select("user_id, skill_id")
+            .in_("user_id", user_ids)
+            .order("user_id")
+            .order("skill_id")
+        ),
+        target_ids
+    )
 
-    # Fetch current user skills
-    user_skill_rows = supabase.table("user_skills").select("skill_id").eq("user_id", user["user_id"]).execute().data
-    user_skill_ids = [row["skill_id"] for row in user_skill_rows]
-    user_skill_names = [
-        supabase.table("skills").select("name").eq("skill_id", skill_id).execute().data[0]["name"]
-        for skill_id in user_skill_ids
+    skills_by_user = {}
+    for row in skill_rows:
+        name = skill_id_to_name.get(row["skill_id"])
+        if name is not None:
+            skills_by_user.setdefault(row["user_id"], []).append(name)
+
+    user_vec = build_skill_vector(user_skill_names, skill_index)
+
+    # Score every target in one batched similarity call
+    target_skill_lists = [skills_by_user.get(target["user_id"], []) for target in targets]
+    target_matrix = build_skill_matrix(target_skill_lists, skill_index)
+    scores = compute_match_scores(user_vec, target_matrix)
+
+    # Only include relevant matches, best score first (stable for ties)
+    relevant = np.flatnonzero(scores > 0)
+    ranked = relevant[np.argsort(-scores[relevant], kind="stable")]
+
+    matches = [
+        {
+            "username": targets[i]["username"],
+            "name": targets[i]["name"],
+            "role": targets[i]["role"],
+            "score": float(scores[i]),
+            "skills": target_skill_lists[i]
+        }
+        for i in ranked
     ]
 
-    user_vec = build_skill_vector(user_skill_names, all_skill_names)
-
-    matches = []
-
-    # Compute match scores with each target
-    for target in targets:
-        target_skill_rows = supabase.table("user_skills").select("skill_id").eq("user_id", target["user_id"]).execute().data
-        target_skill_ids = [row["skill_id"] for row in target_skill_rows]
-        target_skill_names = [
-            supabase.table("skills").select("name").eq("skill_id", skill_id).execute().data[0]["name"]
-            for skill_id in target_skill_ids
-        ]
-
-        target_vec = build_skill_vector(target_skill_names, all_skill_names)
-        score = compute_match_score(user_vec, target_vec)
-
-        if score > 0:  # Only include relevant matches
-            matches.append({
-                "username": target["username"],
-                "name": target["name"],
-                "role": target["role"],
-                "score": score,
-                "skills": target_skill_names
-            })
-
-    # Sort matches by score descending
-    matches.sort(key=lambda x: x["score"], reverse=True)
-
+    cache_matches(cache_key, matches)
     return {"matches": matches}
 
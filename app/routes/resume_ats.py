@@ -1,15 +1,47 @@
 # app/routes/resume_ats.py
+import asyncio
+from concurrent.futures.process import BrokenProcessPool
 from fastapi import APIRouter, File, UploadFile, HTTPException
 from fastapi.responses import JSONResponse
-from typing import Optional
+from typing import Dict, List, Optional
 
-from app.ml.ats_scorer import ATSScorer
+from app.ml.ats_scorer import get_process_pool, reset_process_pool, score_in_worker
 from app.routes.users import get_user_by_username
 
 router = APIRouter(prefix="/resume-ats", tags=["Resume ATS"])
 
-# Initialize ATS scorer
-ats_scorer = ATSScorer()
+MAX_FILE_SIZE = 5 * 1024 * 1024  # 5MB
+READ_CHUNK_SIZE = 64 * 1024
+
+
+async def read_upload(file: UploadFile) -> Optional[bytearray]:
+    """
+    Read an upload in chunks, stopping as soon as it exceeds MAX_FILE_SIZE.
+    Returns None if the file is too large.
+    """
+    buf = bytearray()
+    while chunk := await file.read(READ_CHUNK_SIZE):
+        buf.extend(chunk)
+        if len(buf) > MAX_FILE_SIZE:
+            return None
+    return buf
+
+
+async def score_in_pool(file_bytes: bytearray, filename: str) -> Dict:
+    """
+    Score one resume in a worker process (PDF/DOCX parsing is CPU-bound and holds the GIL).
+    If a worker died (parser crash, OOM kill) the pool is broken for good, so it is
+    replaced and the file retried once.
+    """
+    loop = asyncio.get_running_loop()
+    for attempt in range(2):
+        pool = get_process_pool()
+        try:
+            return await loop.run_in_executor(pool, score_in_worker, file_bytes, filename)
+        except BrokenProcessPool:
+            reset_process_pool(pool)
+            if attempt:
+                raise
 
 
 @router.post("/analyze")
@@ -37,17 +69,17 @@ async def analyze_resume(
                 detail="Invalid file type. Only PDF and DOCX are supported"
             )
         
-        # Read file
-        file_bytes = await file.read()
+        # Read file (aborts early past the 5MB limit)
+        file_bytes = await read_upload(file)
         
-        if len(file_bytes) > 5 * 1024 * 1024:  # 5MB limit
+        if file_bytes is None:
             raise HTTPException(
                 status_code=400,
                 detail="File too large. Maximum size is 5MB"
             )
         
-        # Score the resume
-        score_result = ats_scorer.score_resume(file_bytes, file.filename)
+        # Score the resume in a worker process
+        score_result = await score_in_pool(file_bytes, file.filename)
         
         # Add filename for frontend reference
         score_result['filename'] = file.filename
@@ -63,6 +95,75 @@ async def analyze_resume(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/score-batch")
+async def score_resume_batch(
+    username: str,
+    files: List[UploadFile] = File(...)
+):
+    """
+    Analyze several resumes in one request
+    
+    - Resumes are parsed and scored in parallel worker processes
+    - Returns one score (or error) per file, in upload order
+    - NO database storage - pure computation
+    """
+    try:
+        # Validate user exists
+        user = get_user_by_username(username)
+        if not user:
+            raise HTTPException(status_code=404, detail="User not found")
+        
+        if len(files) > 10:
+            raise HTTPException(
+                status_code=400,
+                detail="Too many files. Maximum is 10 per batch"
+            )
+        
+        batch = []
+        for file in files:
+            # Validate file type
+            if not file.filename.endswith(('.pdf', '.docx')):
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Invalid file type for '{file.filename}'. Only PDF and DOCX are supported"
+                )
+            
+            file_bytes = await read_upload(file)
+            
+            if file_bytes is None:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"File '{file.filename}' too large. Maximum size is 5MB"
+                )
+            
+            batch.append((file_bytes, file.filename))
+        
+        # Score all files in parallel worker processes; a file that fails
+        # to score yields {'error': ...} instead of failing the batch
+        outcomes = await asyncio.gather(
+            *(score_in_pool(file_bytes, filename) for file_bytes, filename in batch),
+            return_exceptions=True
+        )
+        results = [
+            {'error': str(outcome)} if isinstance(outcome, Exception) else outcome
+            for outcome in outcomes
+        ]
+        
+        # Add filename for frontend reference
+        for (_, filename), result in zip(batch, results):
+            result['filename'] = filename
+        
+        return {
+            'message': 'Resumes analyzed successfully',
+            'scores': results
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @router.get("/health")
 async def health_check():
     """
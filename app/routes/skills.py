@@ -1,6 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException
 from app.db import get_supabase
 from app.schemas.skill_schema import SkillCreate
+from app.utils.match_cache import invalidate_skills_cache
 
 router = APIRouter()
 
@@ -12,6 +13,7 @@ def add_skill(skill: SkillCreate, supabase = Depends(get_supabase)):
         "category": skill.category,
         "skill_description": skill.skill_description
     }).execute()
+    invalidate_skills_cache()
     return res.data
 
 # GET ALL
@@ -33,6 +35,7 @@ def update_skill(name: str, updates: dict, supabase = Depends(get_supabase)):
     res = supabase.table("skills").update(updates).eq("name", name).execute()
     if not res.data:
         raise HTTPException(status_code=404, detail="Skill not found")
+    invalidate_skills_cache()
     return res.data[0]
 
 # DELETE
@@ -41,6 +44,7 @@ def delete_skill(name: str, supabase = Depends(get_supabase)):
     res = supabase.table("skills").delete().eq("name", name).execute()
     if not res.data:
         raise HTTPException(status_code=404, detail="Skill not found")
+    invalidate_skills_cache()
     return {"message": "Skill deleted"}
 
 supabase = get_supabase()
@@ -59,6 +63,7 @@ def create_skill(name: str, category="auto", skill_description="auto-added"):
         "category": category,
         "skill_description": skill_description
     }).execute()
+    invalidate_skills_cache()
     return res.data[0]
 
 
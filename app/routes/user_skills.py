@@ -3,6 +3,7 @@ from app.db import get_supabase
 from app.schemas.user_skill_schema import UserSkillAssign
 from app.routes.skills import get_skill_by_name
 from app.routes.users import get_user_by_username
+from app.utils.match_cache import invalidate_match_cache
 
 router = APIRouter(
     prefix="/user-skills",
@@ -58,6 +59,8 @@ def assign_user_skills(data: UserSkillAssign, supabase = Depends(get_supabase)):
         )
 
         inserted_rows.append(res.data[0])
+        # Invalidate per insert: a later unknown skill raises after earlier rows landed
+        invalidate_match_cache()
 
     return {
         "message": f"Skills assigned to user '{data.username}'",
@@ -140,4 +143,6 @@ def remove_user_skill(username: str, skill_name: str, supabase = Depends(get_sup
     if not res.data:
         raise HTTPException(404, "User skill mapping not found")
     
+    invalidate_match_cache()
+    
     return {"message": f"Skill '{skill_name}' removed from user '{username}'"}
\ No newline at end of file
@@ -3,6 +3,7 @@ from app.db import get_supabase
 from app.schemas.user_schema import UserCreate,UserLogin
 from app.utils.hashing import hash_password, verify_password
 from app.utils.auth import create_access_token
+from app.utils.match_cache import invalidate_match_cache
 
 
 router = APIRouter()
@@ -26,6 +27,7 @@ def register(user: UserCreate, supabase = Depends(get_supabase)):
         "profile_summary": user.profile_summary
     }).execute()
 
+    invalidate_match_cache()
     return res.data
 
 
@@ -57,6 +59,7 @@ def update_user(username: str, updates: dict, supabase = Depends(get_supabase)):
     res = supabase.table("users").update(updates).eq("username", username).execute()
     if not res.data:
         raise HTTPException(status_code=404, detail="User not found")
+    invalidate_match_cache()
     return res.data[0]
 
 
@@ -66,6 +69,7 @@ def delete_user(username: str, supabase = Depends(get_supabase)):
     res = supabase.table("users").delete().eq("username", username).execute()
     if res.data == []:
         raise HTTPException(status_code=404, detail="User not found")
+    invalidate_match_cache()
     return {"message": "User deleted"}
 
 supabase = get_supabase()
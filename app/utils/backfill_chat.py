@@ -0,0 +1,93 @@
+# app/utils/backfill_chat.py
+"""
+One-off backfill for chat data written before conversation_id and the
+conversations collection existed. get_chat_history queries by conversation_id
+and get_conversations reads conversation summaries only, so older chats stay
+hidden until this has run.
+
+Run from the repo root right after deploying:
+    python -m app.utils.backfill_chat
+
+Safe to re-run: messages that already have a conversation_id are skipped,
+and existing conversation summaries are never overwritten.
+"""
+import logging
+
+from google.api_core.exceptions import AlreadyExists
+
+from app.utils.firebase_core import get_client
+from app.utils.firebase_chat_db import (
+    FirebaseChatDB, _conversation_id, _iter_pages, _tracked_bulk_writer
+)
+
+logger = logging.getLogger(__name__)
+
+
+def backfill_conversation_ids(db) -> int:
+    """
+    Set conversation_id on every message missing it
+    Returns: Number of messages updated
+    """
+    query = (
+        db.collection(FirebaseChatDB.messages_collection)
+        .select(['from_user', 'to_user', 'conversation_id'])
+    )
+
+    bulk_writer, failures = _tracked_bulk_writer(db)
+    updated = 0
+    for page in _iter_pages(query):
+        for doc in page:
+            data = doc.to_dict()
+            if data.get('conversation_id') is None:
+                bulk_writer.update(
+                    doc.reference,
+                    {'conversation_id': _conversation_id(data['from_user'], data['to_user'])}
+                )
+                updated += 1
+
+    bulk_writer.close()
+    if failures:
+        raise Exception(f"{len(failures)} conversation_id updates failed: {failures[0].message}")
+    return updated
+
+
+def backfill_conversations(db) -> int:
+    """
+    Create the summary document for every conversation that has none
+    Returns: Number of summaries created
+    """
+    query = (
+        db.collection(FirebaseChatDB.messages_collection)
+        .order_by('created_at')
+        .select(['from_user', 'to_user', 'message', 'created_at'])
+    )
+
+    # Messages arrive oldest first, so the last one seen per conversation is its latest
+    latest = {}
+    for page in _iter_pages(query):
+        for doc in page:
+            data = doc.to_dict()
+            latest[_conversation_id(data['from_user'], data['to_user'])] = data
+
+    conversations = db.collection(FirebaseChatDB.conversations_collection)
+    created = 0
+    for conversation_id, data in latest.items():
+        try:
+            # create() fails if the summary exists; one written by
+            # create_message since the deploy is newer than anything here
+            conversations.document(conversation_id).create({
+                'users': sorted((data['from_user'], data['to_user'])),
+                'last_message': data['message'],
+                'last_message_time': data['created_at']
+            })
+            created += 1
+        except AlreadyExists:
+            pass
+    return created
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    db = get_client()
+    logger.info("Set conversation_id on %d messages", backfill_conversation_ids(db))
+    logger.info("Created %d conversation summaries", backfill_conversations(db))
@@ -1,25 +1,117 @@
 # app/utils/firebase_chat_db.py
-import firebase_admin
-from firebase_admin import credentials, firestore
-from datetime import datetime
-from typing import Dict, List, Optional
-import os
+import logging
+from firebase_admin import firestore
+from google.cloud.firestore_v1.field_path import FieldPath
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from threading import Lock
+from typing import Dict, Hashable, List, Optional
+
+from cachetools import TTLCache
+
+from app.utils.firebase_core import get_client
+
+logger = logging.getLogger(__name__)
+
+# Polled read results keyed by ('conversations' | 'unread', username).
+# Writes through this class drop the affected keys; the TTL bounds staleness
+# from writes made by other workers.
+_read_cache = TTLCache(maxsize=10_000, ttl=30)
+_read_cache_lock = Lock()
+
+
+def _cache_get(key: Hashable):
+    """Return the cached value for key, or None on a miss"""
+    with _read_cache_lock:
+        return _read_cache.get(key)
+
+
+def _cache_set(key: Hashable, value) -> None:
+    """Store a read result"""
+    with _read_cache_lock:
+        _read_cache[key] = value
+
+
+def _cache_drop(*keys: Hashable) -> None:
+    """Forget the given keys (call after writes that change them)"""
+    with _read_cache_lock:
+        for key in keys:
+            _read_cache.pop(key, None)
+
+
+# Runs independent queries side by side; each one is a network round trip
+_query_pool = ThreadPoolExecutor(max_workers=16)
+
+# Upper bound on documents fetched by any single query
+QUERY_PAGE_SIZE = 1000
+
+
+def _iter_pages(query, page_size: int = QUERY_PAGE_SIZE):
+    """Yield the documents matching query in pages of at most page_size"""
+    page = list(query.limit(page_size).stream())
+    while page:
+        yield page
+        if len(page) < page_size:
+            break
+        page = list(query.start_after(page[-1]).limit(page_size).stream())
+
+
+# Attempts per write before a BulkWriter gives up on it (its own default)
+BULK_WRITE_MAX_ATTEMPTS = 15
+
+
+def _tracked_bulk_writer(db):
+    """
+    BulkWriter that records writes which still fail after retries.
+    flush()/close() don't raise on failed writes, so check the returned
+    failures list after close().
+    Call close() once at the end and never flush() mid-stream: flush() shuts
+    the writer's executor down, and a later partial batch is then never sent.
+    Full batches are sent as they fill, so memory stays bounded.
+    """
+    failures = []
+    bulk_writer = db.bulk_writer()
+    
+    def on_write_error(error, bulk_writer) -> bool:
+        if error.attempts < BULK_WRITE_MAX_ATTEMPTS:
+            return True  # retry
+        failures.append(error)
+        return False
+    
+    bulk_writer.on_write_error(on_write_error)
+    return bulk_writer, failures
+
+
+def _doc_to_dict(doc) -> Dict:
+    """Message snapshot as a JSON-ready dict: fields + 'id', created_at as ISO 8601"""
+    data = doc.to_dict()
+    data['id'] = doc.id
+    if data.get('created_at'):
+        data['created_at'] = data['created_at'].isoformat()
+    return data
+
+
+def _conversation_id(user1: str, user2: str) -> str:
+    """Order-independent ID shared by all messages between two users"""
+    return '__'.join(sorted((user1, user2)))
+
 
 class FirebaseChatDB:
     """Firebase Firestore Chat Manager"""
     
-    _instance = None
-    _initialized = False
-    
-    def __new__(cls):
-        if cls._instance is None:
-            cls._instance = super(FirebaseChatDB, cls).__new__(cls)
-        return cls._instance
+    messages_collection = 'messages'
+    conversations_collection = 'conversations'
     
     def __init__(self):
-        if not FirebaseChatDB._initialized:
+        # Connected on first use (see db), not at construction
+        self._db = None
+    
+    @property
+    def db(self):
+        """Firestore client, initializing Firebase on first access"""
+        if self._db is None:
             self._initialize_firebase()
-            FirebaseChatDB._initialized = True
+        return self._db
     
     def _initialize_firebase(self):
         return
@@ -27,26 +119,12 @@ class FirebaseChatDB:
         """Initialize Firebase Admin SDK"""
         
         try:
-            # Check if already initialized
-            if not firebase_admin._apps:
-                cred_path = os.path.join(os.path.dirname(__file__), 'firebase_key.json')
-                
-                if not os.path.exists(cred_path):
-                    raise FileNotFoundError(
-                        f"Firebase key not found at {cred_path}. "
-                        "Download from Firebase Console → Project Settings → Service Accounts"
-                    )
-                
-                cred = credentials.Certificate(cred_path)
-                firebase_admin.initialize_app(cred)
+            self._db = get_client()
             
-            self.db = firestore.client()
-            self.messages_collection = 'messages'
+            logger.info("Firebase Chat DB initialized")
             
-            print("✅ Firebase Chat DB initialized successfully")
-            
-        except Exception as e:
-            print(f"❌ Firebase initialization failed: {e}")
+        except Exception:
+            logger.exception("Firebase initialization failed")
             raise
     
     def get_db(self):
@@ -63,31 +141,46 @@ class FirebaseChatDB:
         Returns: Message document with ID and timestamp
         """
         try:
+            created_at = datetime.now(timezone.utc)
+            conversation_id = _conversation_id(from_user, to_user)
             message_data = {
                 'from_user': from_user,
                 'to_user': to_user,
+                'conversation_id': conversation_id,
                 'message': message,
                 'created_at': firestore.SERVER_TIMESTAMP,
                 'read': False
             }
             
-            # Create document with auto-generated ID
+            # Create document with auto-generated ID, and update the
+            # conversation summary in the same atomic batch
             doc_ref = self.db.collection(self.messages_collection).document()
-            doc_ref.set(message_data)
-            
-            # Fetch the document to get the server timestamp
-            doc = doc_ref.get()
-            result = doc.to_dict()
-            result['id'] = doc.id
-            
-            # Convert timestamp to ISO format for JSON serialization
-            if result.get('created_at'):
-                result['created_at'] = result['created_at'].isoformat()
+            batch = self.db.batch()
+            batch.set(doc_ref, message_data)
+            batch.set(
+                self.db.collection(self.conversations_collection).document(conversation_id),
+                {
+                    'users': sorted((from_user, to_user)),
+                    'last_message': message,
+                    'last_message_time': firestore.SERVER_TIMESTAMP
+                },
+                merge=True
+            )
+            batch.commit()
+            _cache_drop(
+                ('conversations', from_user), ('conversations', to_user),
+                ('unread', to_user)
+            )
             
+            # Echo the write back with a client-side timestamp instead of
+            # re-reading the document for the server one
+            result = dict(message_data)
+            result['id'] = doc_ref.id
+            result['created_at'] = created_at.isoformat()
             return result
             
         except Exception as e:
-            print(f"Error creating message: {e}")
+            logger.exception("Error creating message")
             raise Exception(f"Failed to create message: {str(e)}")
     
     def get_chat_history(self, user1: str, user2: str, limit: int = 100) -> List[Dict]:
@@ -96,49 +189,20 @@ class FirebaseChatDB:
         Returns: List of messages ordered by created_at
         """
         try:
-            # Query messages where (from_user=user1 AND to_user=user2) OR (from_user=user2 AND to_user=user1)
-            # Firestore doesn't support OR queries directly, so we do two queries
-            
-            query1 = (
-                self.db.collection(self.messages_collection)
-                .where(filter=firestore.FieldFilter('from_user', '==', user1))
-                .where(filter=firestore.FieldFilter('to_user', '==', user2))
-                .order_by('created_at')
-                .limit(limit)
-            )
-            
-            query2 = (
+            # Both directions share one conversation_id, so a single query
+            # returns the whole conversation already ordered by Firestore
+            query = (
                 self.db.collection(self.messages_collection)
-                .where(filter=firestore.FieldFilter('from_user', '==', user2))
-                .where(filter=firestore.FieldFilter('to_user', '==', user1))
+                .where(filter=firestore.FieldFilter('conversation_id', '==', _conversation_id(user1, user2)))
                 .order_by('created_at')
                 .limit(limit)
+                .select(['from_user', 'to_user', 'message', 'created_at', 'read'])
             )
             
-            messages = []
-            
-            # Execute both queries
-            for doc in query1.stream():
-                data = doc.to_dict()
-                data['id'] = doc.id
-                if data.get('created_at'):
-                    data['created_at'] = data['created_at'].isoformat()
-                messages.append(data)
-            
-            for doc in query2.stream():
-                data = doc.to_dict()
-                data['id'] = doc.id
-                if data.get('created_at'):
-                    data['created_at'] = data['created_at'].isoformat()
-                messages.append(data)
-            
-            # Sort by timestamp
-            messages.sort(key=lambda x: x['created_at'])
+            return [_doc_to_dict(doc) for doc in query.stream()]
             
-            return messages
-            
-        except Exception as e:
-            print(f"Error fetching chat history: {e}")
+        except Exception:
+            logger.exception("Error fetching chat history")
             return []
     
     def get_conversations(self, username: str) -> List[Dict]:
@@ -146,58 +210,40 @@ class FirebaseChatDB:
         Get all conversations for a user
         Returns: List of conversation summaries with last message
         """
+        cached = _cache_get(('conversations', username))
+        if cached is not None:
+            return cached
+        
         try:
-            # Get all messages where user is sender or receiver
-            query1 = (
-                self.db.collection(self.messages_collection)
-                .where(filter=firestore.FieldFilter('from_user', '==', username))
-                .order_by('created_at', direction=firestore.Query.DESCENDING)
-            )
-            
-            query2 = (
-                self.db.collection(self.messages_collection)
-                .where(filter=firestore.FieldFilter('to_user', '==', username))
-                .order_by('created_at', direction=firestore.Query.DESCENDING)
+            # One summary document per conversation, kept current by create_message
+            query = (
+                self.db.collection(self.conversations_collection)
+                .where(filter=firestore.FieldFilter('users', 'array_contains', username))
+                .order_by('last_message_time', direction=firestore.Query.DESCENDING)
+                .limit(QUERY_PAGE_SIZE)
             )
             
-            messages = []
-            
-            for doc in query1.stream():
-                data = doc.to_dict()
-                data['id'] = doc.id
-                if data.get('created_at'):
-                    data['created_at'] = data['created_at'].isoformat()
-                messages.append(data)
-            
-            for doc in query2.stream():
+            result = []
+            for doc in query.stream():
                 data = doc.to_dict()
-                data['id'] = doc.id
-                if data.get('created_at'):
-                    data['created_at'] = data['created_at'].isoformat()
-                messages.append(data)
-            
-            # Sort by timestamp descending
-            messages.sort(key=lambda x: x['created_at'], reverse=True)
-            
-            # Group by conversation partner
-            conversations = {}
-            for msg in messages:
-                other_user = (
-                    msg['to_user'] if msg['from_user'] == username 
-                    else msg['from_user']
-                )
+                users = data['users']
+                other_user = users[1] if users[0] == username else users[0]
+                
+                last_message_time = data.get('last_message_time')
+                if last_message_time:
+                    last_message_time = last_message_time.isoformat()
                 
-                if other_user not in conversations:
-                    conversations[other_user] = {
-                        'user': other_user,
-                        'last_message': msg['message'],
-                        'last_message_time': msg['created_at']
-                    }
+                result.append({
+                    'user': other_user,
+                    'last_message': data['last_message'],
+                    'last_message_time': last_message_time
+                })
             
-            return list(conversations.values())
+            _cache_set(('conversations', username), result)
+            return result
             
-        except Exception as e:
-            print(f"Error fetching conversations: {e}")
+        except Exception:
+            logger.exception("Error fetching conversations")
             return []
     
     def mark_messages_read(self, from_user: str, to_user: str) -> bool:
@@ -211,17 +257,24 @@ class FirebaseChatDB:
                 .where(filter=firestore.FieldFilter('from_user', '==', from_user))
                 .where(filter=firestore.FieldFilter('to_user', '==', to_user))
                 .where(filter=firestore.FieldFilter('read', '==', False))
+                .select([FieldPath.document_id()])  # names only; no fields needed for the update
             )
             
-            batch = self.db.batch()
-            for doc in query.stream():
-                batch.update(doc.reference, {'read': True})
+            # Page through the matches so a huge backlog is never held in memory at once
+            bulk_writer, failures = _tracked_bulk_writer(self.db)
+            for page in _iter_pages(query):
+                for doc in page:
+                    bulk_writer.update(doc.reference, {'read': True})
             
-            batch.commit()
+            bulk_writer.close()
+            if failures:
+                raise Exception(f"{len(failures)} read updates failed: {failures[0].message}")
+            
+            _cache_drop(('unread', to_user))
             return True
             
-        except Exception as e:
-            print(f"Error marking messages as read: {e}")
+        except Exception:
+            logger.exception("Error marking messages as read")
             return False
     
     def delete_conversation(self, user1: str, user2: str) -> bool:
@@ -230,52 +283,61 @@ class FirebaseChatDB:
         Returns: True if successful
         """
         try:
-            # Query messages in both directions
+            # Query messages in both directions (document names only)
             query1 = (
                 self.db.collection(self.messages_collection)
                 .where(filter=firestore.FieldFilter('from_user', '==', user1))
                 .where(filter=firestore.FieldFilter('to_user', '==', user2))
+                .select([FieldPath.document_id()])
             )
             
             query2 = (
                 self.db.collection(self.messages_collection)
                 .where(filter=firestore.FieldFilter('from_user', '==', user2))
                 .where(filter=firestore.FieldFilter('to_user', '==', user1))
+                .select([FieldPath.document_id()])
             )
             
-            # Delete in batches (Firestore limit is 500 per batch)
-            batch = self.db.batch()
-            count = 0
-            
-            for doc in query1.stream():
-                batch.delete(doc.reference)
-                count += 1
-                if count >= 500:
-                    batch.commit()
-                    batch = self.db.batch()
-                    count = 0
+            # Both directions are deleted concurrently; a failed delete raises
+            # here, before the summary and cached reads are touched
+            list(_query_pool.map(self._delete_matching, (query1, query2)))
             
-            for doc in query2.stream():
-                batch.delete(doc.reference)
-                count += 1
-                if count >= 500:
-                    batch.commit()
-                    batch = self.db.batch()
-                    count = 0
-            
-            if count > 0:
-                batch.commit()
+            self.db.collection(self.conversations_collection).document(_conversation_id(user1, user2)).delete()
             
+            _cache_drop(
+                ('conversations', user1), ('conversations', user2),
+                ('unread', user1), ('unread', user2)
+            )
             return True
             
-        except Exception as e:
-            print(f"Error deleting conversation: {e}")
+        except Exception:
+            logger.exception("Error deleting conversation")
             return False
     
+    def _delete_matching(self, query) -> None:
+        """
+        Delete every document matching query, one page at a time
+        BulkWriter chunks, parallelizes and retries the deletes;
+        close() blocks until every delete has been attempted
+        Raises if any delete failed after retries
+        """
+        bulk_writer, failures = _tracked_bulk_writer(self.db)
+        for page in _iter_pages(query):
+            for doc in page:
+                bulk_writer.delete(doc.reference)
+        
+        bulk_writer.close()
+        if failures:
+            raise Exception(f"{len(failures)} message deletes failed: {failures[0].message}")
+    
     def get_unread_count(self, username: str) -> int:
         """
         Get count of unread messages for a user
         """
+        cached = _cache_get(('unread', username))
+        if cached is not None:
+            return cached
+        
         try:
             query = (
                 self.db.collection(self.messages_collection)
@@ -283,15 +345,24 @@ class FirebaseChatDB:
                 .where(filter=firestore.FieldFilter('read', '==', False))
             )
             
-            count = len(list(query.stream()))
+            # Server-side aggregation: one read per 1000 index entries, no documents transferred
+            results = query.count(alias='unread').get()
+            count = int(results[0][0].value)
+            _cache_set(('unread', username), count)
             return count
             
-        except Exception as e:
-            print(f"Error getting unread count: {e}")
+        except Exception:
+            logger.exception("Error getting unread count")
             return 0
 
 
 # Singleton instance
+_chat_db = None
+
+
 def get_firebase_chat_db():
-    """Get FirebaseChatDB instance"""
-    return FirebaseChatDB()
\ No newline at end of file
+    """Get the shared FirebaseChatDB instance (created on first call)"""
+    global _chat_db
+    if _chat_db is None:
+        _chat_db = FirebaseChatDB()
+    return _chat_db
\ No newline at end of file
@@ -0,0 +1,31 @@
+# app/utils/firebase_core.py
+import firebase_admin
+from firebase_admin import credentials, firestore
+import os
+
+_client = None
+
+
+def get_client():
+    """
+    Shared Firestore client for every Firebase-backed store.
+    Initializes the Firebase Admin app on first use; one client (and one
+    gRPC channel pool) serves all collections.
+    """
+    global _client
+    if _client is None:
+        # Check if already initialized
+        if not firebase_admin._apps:
+            cred_path = os.path.join(os.path.dirname(__file__), 'firebase_key.json')
+            
+            if not os.path.exists(cred_path):
+                raise FileNotFoundError(
+                    f"Firebase key not found at {cred_path}. "
+                    "Download from Firebase Console → Project Settings → Service Accounts"
+                )
+            
+            cred = credentials.Certificate(cred_path)
+            firebase_admin.initialize_app(cred)
+        
+        _client = firestore.client()
+    return _client
@@ -0,0 +1,48 @@
+# app/utils/match_cache.py
+from threading import Lock
+from typing import Dict, Hashable, List, Optional
+
+from cachetools import TTLCache
+
+# Ranked /match results keyed by (target_role, sorted skill names).
+# Writes that can change a ranking clear it; the TTL bounds staleness from
+# writes made by other workers or directly in the database.
+_match_cache = TTLCache(maxsize=1024, ttl=60)
+_match_cache_lock = Lock()
+
+
+def get_cached_matches(key: Hashable) -> Optional[List[Dict]]:
+    """Return the cached matches for key, or None on a miss"""
+    with _match_cache_lock:
+        return _match_cache.get(key)
+
+
+def cache_matches(key: Hashable, matches: List[Dict]) -> None:
+    """Store a ranked matches list"""
+    with _match_cache_lock:
+        _match_cache[key] = matches
+
+
+def invalidate_match_cache() -> None:
+    """Drop all cached rankings (call after user, skill or user_skills writes)"""
+    with _match_cache_lock:
+        _match_cache.clear()
+
+
+# Bumped on writes to the skills table; the match router's cached skill map
+# is keyed on it, so the next request refetches skills instead of waiting
+# for the TTL.
+_skills_version = 0
+
+
+def skills_version() -> int:
+    """Current version of the skills table as seen by this process"""
+    return _skills_version
+
+
+def invalidate_skills_cache() -> None:
+    """Expire the cached skill map and all rankings (call after skills writes)"""
+    global _skills_version
+    with _match_cache_lock:
+        _skills_version += 1
+        _match_cache.clear()